@@ -1,10 +1,13 @@
-from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
+from pydantic import BaseModel, Field
+from typing import Optional
 import uvicorn
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import functools
+import math
 import os
 import pickle
 from sklearn.preprocessing import normalize
@@ -18,10 +21,25 @@ except ImportError:
     EMBEDDING_MODEL_AVAILABLE = False
     print("sentence-transformers not available - embedding-based search disabled")
 
+# Optional: numba for the fused unnormalized cosine kernel
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Optional: faiss for SIMD-accelerated top-k retrieval
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
 app = FastAPI(
     title="Health Podcast Recommendation System",
     description="A content-based recommendation system for health and wellness podcasts",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Mount static files
@@ -36,6 +54,43 @@ tfidf_matrix = None
 cosine_sim = None
 vectorizer = None
 
+# Prepared embeddings are saved here and memory-mapped back, so parallel
+# workers share the pages instead of each holding their own copy
+EMBEDDINGS_CACHE_PATH = "podcast_youtube_recommender/combined_embeddings.npy"
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_unnorm(vec, matrix):
+        """
+        Cosine similarity between `vec` and each row of `matrix`, fusing the
+        norm and dot product into one streaming pass over the matrix instead
+        of the three passes the NumPy expression makes.
+        """
+        out = np.empty(matrix.shape[0])
+        vec_norm = 0.0
+        for j in range(vec.shape[0]):
+            vec_norm += vec[j] * vec[j]
+        vec_norm = math.sqrt(vec_norm)
+        for i in prange(matrix.shape[0]):
+            dot = 0.0
+            row_norm = 0.0
+            for j in range(matrix.shape[1]):
+                dot += vec[j] * matrix[i, j]
+                row_norm += matrix[i, j] * matrix[i, j]
+            out[i] = dot / (vec_norm * math.sqrt(row_norm) + 1e-12)
+        return out
+
+
+@functools.lru_cache(maxsize=1024)
+def _encode_query(model, text: str):
+    """
+    Encode a query string, caching the result so repeat queries skip the
+    transformer forward pass. Module-level (keyed on the model instance and
+    text) to keep the recommendation system itself out of the cache key.
+    """
+    return model.encode(text)
+
+
 class PodcastRecommendationSystem:
     def __init__(self, transcript_weight=0.7, metadata_weight = 0.3):
         self.podcast_data = None
@@ -45,8 +100,8 @@ class PodcastRecommendationSystem:
         self.transcript_embeddings = None
         self.metadata_embeddings = None
         self.combined_embeddings = None
-        self.cosine_sim = None
         self.embedding_model = None
+        self.index = None
         
     def load_data(self, data_path: str):
         """Load podcast data from CSV file"""
@@ -128,9 +183,11 @@ class PodcastRecommendationSystem:
                 (transcript_dims == common_dim) & (metadata_dims == common_dim)
             ].reset_index(drop=True)
 
-            # Now safely convert to arrays
-            self.transcript_embeddings = np.vstack(self.podcast_data["transcript_embedding_mean"].to_numpy())
-            self.metadata_embeddings = np.vstack(self.podcast_data["metadata_embedding"].to_numpy())
+            # Now safely convert to arrays, as float32: the similarity dot
+            # products are bandwidth-bound, so halving the element size
+            # roughly halves their cost
+            self.transcript_embeddings = np.vstack(self.podcast_data["transcript_embedding_mean"].to_numpy()).astype(np.float32)
+            self.metadata_embeddings = np.vstack(self.podcast_data["metadata_embedding"].to_numpy()).astype(np.float32)
 
             print(f"Transcript embeddings shape: {self.transcript_embeddings.shape}")
             print(f"Metadata embeddings shape: {self.metadata_embeddings.shape}")
@@ -144,11 +201,28 @@ class PodcastRecommendationSystem:
                 self.metadata_weight * self.metadata_embeddings
             )
             
-            # Normalize combined embeddings row-wise to unit length
+            # Normalize combined embeddings row-wise to unit length; top-k
+            # similarities are computed on the fly from this matrix instead of
+            # materialising the full N x N cosine matrix
             self.combined_embeddings = normalize(self.combined_embeddings, norm='l2', axis=1)
 
-            print("Calculating similarity matrix...")
-            self.cosine_sim = cosine_similarity(self.combined_embeddings, self.combined_embeddings)
+            # Save to disk and memory-map back so concurrent processes share
+            # the embedding pages (write via a temp file to stay atomic).
+            # Purely an optimization: fall back to the in-memory array if the
+            # filesystem is not writable.
+            try:
+                tmp_path = EMBEDDINGS_CACHE_PATH.replace(".npy", f".{os.getpid()}.npy")
+                np.save(tmp_path, self.combined_embeddings)
+                os.replace(tmp_path, EMBEDDINGS_CACHE_PATH)
+                self.combined_embeddings = np.load(EMBEDDINGS_CACHE_PATH, mmap_mode="r")
+            except OSError as e:
+                print(f"Warning: Could not memory-map embeddings: {e}")
+
+            # Build an exact inner-product index when faiss is available;
+            # the rows are unit length, so inner product equals cosine
+            if FAISS_AVAILABLE:
+                self.index = faiss.IndexFlatIP(self.combined_embeddings.shape[1])
+                self.index.add(np.ascontiguousarray(self.combined_embeddings))
 
             print("✅ Recommendation system prepared successfully!")
             return True
@@ -158,93 +232,128 @@ class PodcastRecommendationSystem:
             return False
         
      
+    def top_k(self, idx: int, k: int):
+        """
+        Find the k podcasts most similar to the podcast at row `idx`.
+        Computes one row of cosine similarities on the fly and partial-sorts
+        it, so the full pairwise matrix is never materialised.
+        Returns:
+            (indices, similarities): two 1D arrays of shape (k,), most
+            similar first, excluding the podcast itself
+        """
+        k = max(0, min(k, self.combined_embeddings.shape[0] - 1))
+        if k == 0:
+            # Non-positive k: nothing to recommend
+            return np.array([], dtype=int), np.array([], dtype=np.float32)
+
+        if self.index is not None:
+            # Ask for one extra neighbor so the podcast itself can be dropped
+            sims, indices = self.index.search(
+                np.ascontiguousarray(self.combined_embeddings[idx:idx + 1]), k + 1
+            )
+            keep = indices[0] != idx
+            return indices[0][keep][:k], sims[0][keep][:k]
+
+        sims = self.combined_embeddings @ self.combined_embeddings[idx]
+        sims[idx] = -np.inf  # exclude the podcast itself
+        top = np.argpartition(-sims, k)[:k]
+        top = top[np.argsort(-sims[top])]
+        return top, sims[top]
+
+
+    def _records(self, rows, similarities):
+        """
+        Turn recommendation rows into plain dicts with their similarity
+        scores, so callers get JSON-ready results without a per-request
+        DataFrame copy.
+        """
+        return [
+            {
+                "title": row.get("title", "Unknown"),
+                "host": row.get("host", "Unknown Host"),
+                "duration_min": row.get("duration_min", 0),
+                "similarity": float(similarity),
+            }
+            for row, similarity in zip(rows.to_dict("records"), similarities)
+        ]
+
+
     def get_random_playlist(self, n_recommendations: int = 5):
-        
-        random_idx = np.random.randint(0, len(self.podcast_data))
 
-        # Get similarity scores
-        sim_scores = list(enumerate(self.cosine_sim[random_idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+        random_idx = np.random.randint(0, len(self.podcast_data))
 
         # Get top N recommendations (excluding the podcast itself)
-        sim_scores = sim_scores[1:n_recommendations+1]
-        podcast_indices = [i[0] for i in sim_scores]
+        podcast_indices, sim_scores = self.top_k(random_idx, n_recommendations)
 
         # Get the recommended podcasts with similarity scores
-        recommendations = self.podcast_data.iloc[podcast_indices].copy()
-        recommendations["similarity"] = [score[1] for score in sim_scores]
+        return self._records(self.podcast_data.iloc[podcast_indices], sim_scores)
 
-        return recommendations
-    
-    
-    def cosine_similarity_matrix(self, vec, matrix, normalized=True):
+
+    def cosine_similarity_matrix(self, queries, matrix, normalized=True):
         """
-        Compute cosine similarity between a single vector `vec` and each row vector in `matrix`.
-        vec: 1D numpy array, shape (d,)
+        Compute cosine similarity between one or more query vectors and each
+        row vector in `matrix` as a single matrix product.
+        queries: 1D numpy array of shape (d,), or 2D array of shape (m, d)
         matrix: 2D numpy array, shape (n, d)
         Returns:
-            similarities: 1D numpy array, shape (n,)
+            similarities: shape (n,) for a single query, (m, n) for a batch
         """
-        
-        if normalized:
-            return np.dot(matrix, vec)
-            
-        else:
-            # Normalize the input vector and matrix row-wise
-            vec_norm = vec / np.linalg.norm(vec)
-            matrix_norm = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
-            
-            # Dot product between vec and each row in matrix (broadcasting)
-            similarities = np.dot(matrix_norm, vec_norm)
-            return similarities
+
+        if not normalized and NUMBA_AVAILABLE and np.ndim(queries) == 1:
+            # Single unnormalized query: use the fused JIT kernel
+            return _cosine_unnorm(
+                np.ascontiguousarray(queries, dtype=np.float64),
+                np.ascontiguousarray(matrix, dtype=np.float64),
+            )
+
+        Q = np.atleast_2d(queries)
+
+        if not normalized:
+            # Normalize the query vectors and matrix row-wise
+            Q = Q / np.linalg.norm(Q, axis=1, keepdims=True)
+            matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        # One GEMM covers the whole batch of queries
+        similarities = Q @ matrix.T
+
+        return similarities[0] if np.ndim(queries) == 1 else similarities
     
     def item_based_filtering(self, podcast_title: str, n_recommendations: int = 5):
         """Get recommendations based on podcast title"""
-        if self.podcast_data is None or self.cosine_sim is None:
+        if self.podcast_data is None or self.combined_embeddings is None:
             return []
-        
+
         # Check if embedding model is available
         if self.embedding_model is None:
             raise ValueError("Embedding model not available. This feature requires sentence-transformers.")
-            
+
         # Encode user input
-        user_emb = self.embedding_model.encode(podcast_title)
-        
+        user_emb = _encode_query(self.embedding_model, podcast_title)
+
         # Normlaize input
         user_emb_norm = normalize(user_emb.reshape(1, -1))[0]
-        
-        df = self.podcast_data.copy()
 
         # Stack embeddings into a numpy matrix
-        normalized_embeddings_matrix = np.vstack(df['metadata_embedding'].values)
+        normalized_embeddings_matrix = np.vstack(self.podcast_data['metadata_embedding'].values)
 
         # Compute all cosine similarities at once
         similarities = self.cosine_similarity_matrix(user_emb_norm, normalized_embeddings_matrix)
 
-        # Add similarity scores
-        df = df.assign(similarity=similarities)
-        
-        try:
-            # Get top_n most similar rows
-            top_match_idx = df.sort_values(by="similarity", ascending=False).index[0]
-        except IndexError:
+        if similarities.size == 0:
             # If exact match not found, return none
             return None
-                
-        # Get similarity scores
-        sim_scores = list(enumerate(self.cosine_sim[top_match_idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        
+
+        # Best matching podcast for the user's title
+        top_match_idx = int(np.argmax(similarities))
+
         # Get top N recommendations (excluding the podcast itself)
-        sim_scores = sim_scores[1:n_recommendations+1]
-        podcast_indices = [i[0] for i in sim_scores]
-        
+        podcast_indices, sim_scores = self.top_k(top_match_idx, n_recommendations)
+
         # Get the recommended podcasts with similarity scores
-        recommendations = self.podcast_data.iloc[podcast_indices].copy()
-        recommendations["similarity"] = [score[1] for score in sim_scores]
-        
+        recommendations = self._records(self.podcast_data.iloc[podcast_indices], sim_scores)
+
         print(recommendations)
-        
+
         return recommendations
     
      
@@ -256,14 +365,17 @@ class PodcastRecommendationSystem:
         if self.embedding_model is None:
             raise ValueError("Embedding model not available. This feature requires sentence-transformers.")
         
-        df = self.podcast_data.copy()
-        
+        df = self.podcast_data
+
         if max_min is not None:
             df = df[df['duration_min'] <= max_min]
+            if len(df) == 0:
+                # Nothing fits the duration budget
+                return []
         
         # Encode user input
-        user_emb = self.embedding_model.encode(user_input)
-        
+        user_emb = _encode_query(self.embedding_model, user_input)
+
         # Normalize User Input
         user_emb_norm = normalize(user_emb.reshape(1, -1))[0]
 
@@ -273,20 +385,31 @@ class PodcastRecommendationSystem:
         # Compute all cosine similarities at once
         similarities = self.cosine_similarity_matrix(user_emb_norm, normalized_embeddings_matrix)
 
-        # Add similarity scores
-        df = df.assign(similarity=similarities)
-
         # Get top_n most similar rows
-        top = df.sort_values(by="similarity", ascending=False).head(top_n)
-        
+        order = np.argsort(-similarities)[:top_n]
+        top = self._records(df.iloc[order], similarities[order])
+
         print(top)
-        
+
         return top
     
     
 # Initialize recommendation system
 recommendation_system = PodcastRecommendationSystem()
 
+# Request bodies for the recommendation endpoints (JSON instead of form data)
+class RecommendationRequest(BaseModel):
+    podcast_title: str
+    num_recommendations: int = Field(5, ge=0)
+
+class RandomPlaylistRequest(BaseModel):
+    num_recommendations: int = Field(5, ge=0)
+
+class ContentRecommendationRequest(BaseModel):
+    user_input: str
+    num_recommendations: int = Field(5, ge=0)
+    max_duration: Optional[int] = None
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the recommendation system on startup"""
@@ -318,76 +441,67 @@ async def recommendations_page(request: Request):
     )
 
 @app.post("/get_recommendations")
-async def get_recommendations(podcast_title: str = Form(...), num_recommendations: int = Form(5)):
+async def get_recommendations(request: RecommendationRequest):
     """API endpoint to get podcast recommendations based on title"""
     try:
-        recommendations = recommendation_system.item_based_filtering(podcast_title, num_recommendations)
+        recommendations = recommendation_system.item_based_filtering(request.podcast_title, request.num_recommendations)
         
         if recommendations is None:
             return {"recommendations": []}
-            
-        # Convert to list of dictionaries for JSON response
-        recommendations_list = []
-        for _, row in recommendations.iterrows():
-            
-            recommendations_list.append({
-                'title': row.get('title', 'Unknown'),
-                'host': row.get('host', 'Unknown Host'),
-                'duration_min': row.get('duration_min', 0),
-                'similarity_score': float(row.get("similarity", 0.0))
-            })
-        
-        return {"recommendations": recommendations_list}
+
+        return {"recommendations": [
+            {
+                'title': rec['title'],
+                'host': rec['host'],
+                'duration_min': rec['duration_min'],
+                'similarity_score': rec['similarity']
+            }
+            for rec in recommendations
+        ]}
     except Exception as e:
         print(f"Error in get_recommendations endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting recommendations: {str(e)}")
     
 
 @app.post("/get_random_playlist")
-async def get_random_playlist(num_recommendations: int = Form(5)):
+async def get_random_playlist(request: RandomPlaylistRequest):
     """API endpoint to get a random playlist of podcast recommendations"""
     try:
         # Pass max_duration as max_min to the method
-        recommendations = recommendation_system.get_random_playlist(num_recommendations)
-        
-        # Convert to list of dictionaries for JSON response
-        recommendations_list = []
-        for _, row in recommendations.iterrows():
-           
-            recommendations_list.append({
-                'title': row.get('title', 'Unknown'),
-                'host': row.get('host', 'Unknown Host'),
-                'duration_min': row.get('duration_min', 0),
-                'similarity_score': float(row.get("similarity", 0.0))
-            })
-        
-        return {"recommendations": recommendations_list}
+        recommendations = recommendation_system.get_random_playlist(request.num_recommendations)
+
+        return {"recommendations": [
+            {
+                'title': rec['title'],
+                'host': rec['host'],
+                'duration_min': rec['duration_min'],
+                'similarity_score': rec['similarity']
+            }
+            for rec in recommendations
+        ]}
     except Exception as e:
         print(f"Error in get_random_playlist endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting random playlist: {str(e)}")
 
 @app.post("/get_content_recommendations")
-async def get_content_recommendations(user_input: str = Form(...), num_recommendations: int = Form(5), max_duration: int = Form(None)):
+async def get_content_recommendations(request: ContentRecommendationRequest):
     """API endpoint to get recommendations based on user's health goals or concerns"""
     try:
         recommendations = recommendation_system.content_filtering(
-            user_input, 
-            top_n=num_recommendations, 
-            max_min=max_duration
+            request.user_input,
+            top_n=request.num_recommendations,
+            max_min=request.max_duration
         )
-        
-        # Convert to list of dictionaries for JSON response
-        recommendations_list = []
-        for _, row in recommendations.iterrows():
-            
-            recommendations_list.append({
-                'title': row.get('title', 'Unknown'),
-                'host': row.get('host', 'Unknown Host'),
-                'duration_min': row.get('duration_min', 0),
-                'similarity_score': float(row.get("similarity", 0.0))
-            })
-        
-        return {"recommendations": recommendations_list}
+
+        return {"recommendations": [
+            {
+                'title': rec['title'],
+                'host': rec['host'],
+                'duration_min': rec['duration_min'],
+                'similarity_score': rec['similarity']
+            }
+            for rec in recommendations
+        ]}
     except Exception as e:
         print(f"Error in get_content_recommendations endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting content recommendations: {str(e)}")
@@ -121,7 +121,7 @@ async function handleEpisodeFormSubmission(event) {
     console.log('Episode form submitted');
 
     const form = event.target;
-    const formData = new FormData(form);
+    const payload = Object.fromEntries(new FormData(form).entries());
 
     // Show loading spinner
     showLoading();
@@ -130,7 +130,8 @@ async function handleEpisodeFormSubmission(event) {
         // Make API call to get episode-based recommendations
         const response = await fetch('/get_recommendations', {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(payload)
         });
 
         if (!response.ok) {
@@ -156,7 +157,7 @@ async function handleRandomFormSubmission(event) {
     console.log('Random form submitted');
 
     const form = event.target;
-    const formData = new FormData(form);
+    const payload = Object.fromEntries(new FormData(form).entries());
 
     // Show loading spinner
     showLoading();
@@ -165,7 +166,8 @@ async function handleRandomFormSubmission(event) {
         // Make API call to get random playlist
         const response = await fetch('/get_random_playlist', {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(payload)
         });
 
         if (!response.ok) {
@@ -191,12 +193,11 @@ async function handleContentFormSubmission(event) {
     console.log('Content form submitted');
 
     const form = event.target;
-    const formData = new FormData(form);
+    const payload = Object.fromEntries(new FormData(form).entries());
 
     // Handle empty max_duration
-    const maxDuration = formData.get('max_duration');
-    if (maxDuration === '') {
-        formData.delete('max_duration');
+    if (payload.max_duration === '') {
+        delete payload.max_duration;
     }
 
     // Show loading spinner
@@ -206,7 +207,8 @@ async function handleContentFormSubmission(event) {
         // Make API call to get content-based recommendations
         const response = await fetch('/get_content_recommendations', {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(payload)
         });
 
         if (!response.ok) {
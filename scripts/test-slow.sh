@@ -0,0 +1,4 @@
+#!/bin/bash
+# Run the slow tests (real embedding-model inference) that the default run deselects
+
+docker compose run --rm ml_service sh -c "pip install -q -r requirements-dev.txt && pytest tests/ -v -m slow $*"
@@ -1,4 +1,4 @@
 #!/bin/bash
 # Run tests inside Docker container
 
-docker compose run --rm ml_service sh -c "pip install -q pytest pytest-asyncio httpx && pytest tests/ -v $*"
+docker compose run --rm ml_service sh -c "pip install -q -r requirements-dev.txt && pytest tests/ -v $*"
@@ -1,7 +1,26 @@
 """Pytest configuration and shared fixtures."""
 
+import hashlib
+import os
+import pickle
+import zlib
+
+import numpy as np
 import pytest
 
+DATA_PATH = "podcast_youtube_recommender/transformers_embedded_podcast_data.pkl"
+
+
+def pytest_addoption(parser):
+    """Register the --cached flag for reusing a prepared recommendation system."""
+    parser.addoption(
+        "--cached",
+        action="store_true",
+        default=False,
+        help="restore the prepared recommendation system from the pytest cache "
+             "instead of rebuilding embeddings (local runs only)",
+    )
+
 
 def pytest_configure(config):
     """Configure pytest markers."""
@@ -13,12 +32,198 @@ def pytest_configure(config):
     )
 
 
-@pytest.fixture(scope="session")
-def test_client():
-    """Create a test client that triggers startup events."""
+def _recsys_cache_file(config):
+    """Cache file keyed on the podcast data and app code, so stale pickles are never reused."""
+    digest = hashlib.sha1()
+    for path in (DATA_PATH, "app/main.py"):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return config.cache.mkdir("recsys") / f"{digest.hexdigest()}.pkl"
+
+
+def _install_recsys_cache(config):
+    """Wrap prepare_recommendations to restore/dump its result via the pytest cache.
+
+    On a hit the whole embedding preparation (cleaning, stacking, cosine
+    matrix) is skipped; on a miss it runs normally and the prepared state is
+    pickled for the next run. The embedding model itself is never pickled.
+    """
+    import app.main as main
+
+    if not os.path.exists(DATA_PATH):
+        return
+    cache_file = _recsys_cache_file(config)
+    original = main.PodcastRecommendationSystem.prepare_recommendations
+
+    def cached_prepare(self):
+        if cache_file.exists():
+            with open(cache_file, "rb") as f:
+                self.__dict__.update(pickle.load(f))
+            print("Recommendation system restored from pytest cache")
+            return True
+        ok = original(self)
+        if ok:
+            state = {k: v for k, v in self.__dict__.items() if k != "embedding_model"}
+            tmp = cache_file.with_suffix(f".tmp{os.getpid()}")
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f)
+            os.replace(tmp, cache_file)
+        return ok
+
+    main.PodcastRecommendationSystem.prepare_recommendations = cached_prepare
+
+
+def _install_query_cache(config):
+    """Back app.main._encode_query with a cache file that outlives the run.
+
+    Real-model query encodes are expensive transformer forwards, and xdist
+    workers plus repeat runs keep encoding the same handful of strings.
+    Vectors are persisted keyed on the query text; encodes from the
+    per-test fake models are never persisted since their vectors are
+    instance-specific. Clear with --cache-clear if the model changes.
+    """
+    import app.main as main
+
+    cache_file = config.cache.mkdir("recsys") / "query_emb.npz"
+    cache = {}
+    if cache_file.exists():
+        try:
+            with np.load(cache_file) as npz:
+                cache = dict(npz)
+        except Exception:
+            cache = {}
+
+    original = main._encode_query
+
+    def cached_encode(model, text):
+        persist = main.EMBEDDING_MODEL_AVAILABLE and isinstance(model, main.SentenceTransformer)
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if persist and key in cache:
+            return cache[key]
+        vector = original(model, text)
+        if persist:
+            cache[key] = vector
+        return vector
+
+    # Keep the lru_cache introspection available to tests
+    cached_encode.cache_info = original.cache_info
+    main._encode_query = cached_encode
+    config._query_emb_cache = (cache_file, cache, len(cache))
+
+
+def _flush_query_cache(config):
+    """Merge this worker's new query vectors into the shared cache file."""
+    state = getattr(config, "_query_emb_cache", None)
+    if state is None:
+        return
+    cache_file, cache, initial_size = state
+    if len(cache) == initial_size:
+        return
+
+    from filelock import FileLock
+
+    # Serialise the read-merge-write against other xdist workers
+    with FileLock(f"{cache_file}.lock"):
+        merged = {}
+        if cache_file.exists():
+            try:
+                with np.load(cache_file) as npz:
+                    merged = dict(npz)
+            except Exception:
+                merged = {}
+        merged.update(cache)
+        np.savez(cache_file, **merged)
+
+
+def pytest_sessionstart(session):
+    """Start the app exactly once per (worker) process.
+
+    Entering the TestClient here rather than in a scoped fixture makes the
+    startup cost (data load + embedding preparation) truly once-per-session
+    and immune to same-named fixtures re-triggering it per module.
+    """
+    # The xdist controller schedules tests but never runs them
+    if session.config.pluginmanager.hasplugin("dsession"):
+        return
+
     from fastapi.testclient import TestClient
     from app.main import app
 
-    # Use context manager to trigger startup/shutdown events
-    with TestClient(app) as client:
-        yield client
+    if session.config.getoption("--cached"):
+        _install_recsys_cache(session.config)
+    _install_query_cache(session.config)
+
+    session.config._test_client = TestClient(app)
+    session.config._test_client.__enter__()
+
+    # Absorb numba JIT compilation outside the tests themselves
+    import app.main
+    if app.main.NUMBA_AVAILABLE:
+        app.main.PodcastRecommendationSystem().cosine_similarity_matrix(
+            np.ones(4), np.ones((2, 4)), normalized=False
+        )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Run the app shutdown hooks once at the end of the session."""
+    _flush_query_cache(session.config)
+    test_client = getattr(session.config, "_test_client", None)
+    if test_client is not None:
+        test_client.__exit__(None, None, None)
+
+
+@pytest.fixture(scope="session")
+def client(request):
+    """The process-wide test client started in pytest_sessionstart."""
+    return request.config._test_client
+
+
+@pytest.fixture(scope="session")
+def main_module():
+    """The app.main module, imported lazily and exactly once per worker.
+
+    Test modules should take this fixture instead of importing app.main at
+    the top level, keeping the heavy import out of module collection.
+    """
+    import app.main
+    return app.main
+
+
+@pytest.fixture(scope="session")
+def recommendation_system(main_module):
+    """The live recommendation system instance from app.main."""
+    return main_module.recommendation_system
+
+
+class FakeSentenceTransformer:
+    """Deterministic stand-in for the sentence-transformers model.
+
+    Returns hash-seeded random vectors so tests can exercise the
+    recommendation logic without loading real model weights. The same
+    text always maps to the same vector, in every process.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _encode_one(self, text):
+        seed = zlib.crc32(text.encode("utf-8"))
+        return np.random.default_rng(seed).standard_normal(self.dim)
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            return self._encode_one(texts)
+        return np.vstack([self._encode_one(text) for text in texts])
+
+
+@pytest.fixture
+def fake_embedding_model(monkeypatch, recommendation_system):
+    """Swap the loaded embedding model for a deterministic fake.
+
+    Tests that check semantic ranking quality should use the real model
+    and carry the ``integration`` marker instead.
+    """
+    fake = FakeSentenceTransformer()
+    monkeypatch.setattr(recommendation_system, "embedding_model", fake)
+    return fake
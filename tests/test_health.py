@@ -1,18 +1,5 @@
 """Tests for the HealthCast API health endpoint."""
 
-import pytest
-from fastapi.testclient import TestClient
-
-from app.main import app
-
-
-@pytest.fixture(scope="module")
-def client():
-    """Create a test client that triggers startup events."""
-    with TestClient(app) as c:
-        yield c
-
-
 class TestHealthEndpoint:
     """Tests for the /health endpoint."""
 
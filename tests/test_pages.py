@@ -1,18 +1,5 @@
 """Tests for the HealthCast web pages."""
 
-import pytest
-from fastapi.testclient import TestClient
-
-from app.main import app
-
-
-@pytest.fixture(scope="module")
-def client():
-    """Create a test client that triggers startup events."""
-    with TestClient(app) as c:
-        yield c
-
-
 class TestLandingPage:
     """Tests for the landing page."""
 
@@ -27,9 +14,18 @@ class TestLandingPage:
         assert "text/html" in response.headers["content-type"]
 
     def test_landing_page_contains_title(self, client):
-        """Landing page should contain the app title."""
-        response = client.get("/")
-        assert b"HealthCast" in response.content or b"Health" in response.content
+        """Landing page should contain the app title.
+
+        Streams the body and stops reading as soon as the marker shows up,
+        instead of materialising the whole rendered page.
+        """
+        buf = b""
+        with client.stream("GET", "/") as response:
+            for chunk in response.iter_bytes():
+                buf += chunk
+                if b"HealthCast" in buf or b"Health" in buf:
+                    break
+        assert b"HealthCast" in buf or b"Health" in buf
 
 
 class TestRecommendationsPage:
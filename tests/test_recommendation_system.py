@@ -2,69 +2,65 @@
 
 import numpy as np
 import pytest
-from fastapi.testclient import TestClient
 
-from app.main import PodcastRecommendationSystem, recommendation_system, app
 
-
-@pytest.fixture(scope="module", autouse=True)
-def init_app():
-    """Initialize the app to trigger startup events."""
-    with TestClient(app):
-        yield
+@pytest.fixture(autouse=True)
+def _ensure_app_started(client):
+    """Reuse the session-scoped client so startup runs only once."""
 
 
 class TestPodcastRecommendationSystemInit:
     """Tests for PodcastRecommendationSystem initialization."""
 
-    def test_default_weights(self):
+    def test_default_weights(self, main_module):
         """Should initialize with default weights."""
-        system = PodcastRecommendationSystem()
+        system = main_module.PodcastRecommendationSystem()
         assert system.transcript_weight == 0.7
         assert system.metadata_weight == 0.3
 
-    def test_custom_weights(self):
+    def test_custom_weights(self, main_module):
         """Should accept custom weights."""
-        system = PodcastRecommendationSystem(transcript_weight=0.6, metadata_weight=0.4)
+        system = main_module.PodcastRecommendationSystem(transcript_weight=0.6, metadata_weight=0.4)
         assert system.transcript_weight == 0.6
         assert system.metadata_weight == 0.4
 
-    def test_initial_state(self):
+    def test_initial_state(self, main_module):
         """Should initialize with None values."""
-        system = PodcastRecommendationSystem()
+        system = main_module.PodcastRecommendationSystem()
         assert system.podcast_data is None
         assert system.transcript_embeddings is None
         assert system.metadata_embeddings is None
         assert system.combined_embeddings is None
-        assert system.cosine_sim is None
 
 
 class TestCoseSimilarityMatrix:
     """Tests for cosine similarity calculation."""
 
-    def test_cosine_similarity_normalized(self):
-        """Should compute cosine similarity for normalized vectors."""
-        system = PodcastRecommendationSystem()
+    def test_cosine_similarity_normalized(self, main_module):
+        """Should compute cosine similarity for a batch of normalized vectors in one call."""
+        system = main_module.PodcastRecommendationSystem()
 
         # Create normalized test vectors
-        vec = np.array([1.0, 0.0, 0.0])
         matrix = np.array([
-            [1.0, 0.0, 0.0],  # Same as vec
-            [0.0, 1.0, 0.0],  # Orthogonal
-            [0.5, 0.5, 0.0],  # 45 degrees
+            [1.0, 0.0, 0.0],
+            [0.0, 1.0, 0.0],  # Orthogonal to the first
+            [0.5, 0.5, 0.0],  # 45 degrees from the first
         ])
         # Normalize the matrix rows
         matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
 
-        similarities = system.cosine_similarity_matrix(vec, matrix, normalized=True)
+        # All query vectors go through a single call
+        similarities = system.cosine_similarity_matrix(matrix, matrix, normalized=True)
 
-        assert len(similarities) == 3
-        assert similarities[0] == pytest.approx(1.0, abs=0.01)  # Same vector
-        assert similarities[1] == pytest.approx(0.0, abs=0.01)  # Orthogonal
+        assert similarities.shape == (3, 3)
+        # Same vector, orthogonal, and 45 degrees - checked in one call
+        np.testing.assert_allclose(
+            similarities[0], [1.0, 0.0, 1 / np.sqrt(2)], atol=1e-5
+        )
 
-    def test_cosine_similarity_unnormalized(self):
+    def test_cosine_similarity_unnormalized(self, main_module):
         """Should compute cosine similarity for unnormalized vectors."""
-        system = PodcastRecommendationSystem()
+        system = main_module.PodcastRecommendationSystem()
 
         vec = np.array([2.0, 0.0, 0.0])
         matrix = np.array([
@@ -75,36 +71,53 @@ class TestCoseSimilarityMatrix:
         similarities = system.cosine_similarity_matrix(vec, matrix, normalized=False)
 
         assert len(similarities) == 2
-        assert similarities[0] == pytest.approx(1.0, abs=0.01)  # Same direction
-        assert similarities[1] == pytest.approx(0.0, abs=0.01)  # Orthogonal
+        # Same direction and orthogonal
+        np.testing.assert_allclose(similarities, [1.0, 0.0], atol=1e-5)
 
 
 class TestLoadedRecommendationSystem:
     """Tests for the loaded recommendation system."""
 
-    def test_data_loaded(self):
+    def test_data_loaded(self, recommendation_system):
         """Should have podcast data loaded."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
         assert len(recommendation_system.podcast_data) > 0
 
-    def test_embeddings_prepared(self):
+    def test_embeddings_prepared(self, recommendation_system):
         """Should have embeddings prepared."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
         assert recommendation_system.transcript_embeddings is not None
         assert recommendation_system.metadata_embeddings is not None
         assert recommendation_system.combined_embeddings is not None
+        # Kept in float32 end-to-end to halve similarity bandwidth
+        assert recommendation_system.combined_embeddings.dtype == np.float32
 
-    def test_similarity_matrix_computed(self):
-        """Should have similarity matrix computed."""
+    def test_top_k_neighbors(self, main_module, recommendation_system):
+        """Should compute top-k neighbors without a full similarity matrix."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
-        assert recommendation_system.cosine_sim is not None
-        # Should be square matrix
-        assert recommendation_system.cosine_sim.shape[0] == recommendation_system.cosine_sim.shape[1]
+        indices, similarities = recommendation_system.top_k(0, 5)
+        assert indices.shape == (5,)
+        assert similarities.shape == (5,)
+        # The podcast itself is excluded from its own neighbors
+        assert 0 not in indices
+        if main_module.FAISS_AVAILABLE:
+            # Every podcast is in the retrieval index
+            assert recommendation_system.index.ntotal == len(recommendation_system.podcast_data)
+
+    def test_top_k_non_positive(self, recommendation_system):
+        """Non-positive k should return empty results, not the whole catalog."""
+        if recommendation_system.podcast_data is None:
+            pytest.skip("Recommendation system not loaded")
+        for k in (0, -1):
+            indices, similarities = recommendation_system.top_k(0, k)
+            assert len(indices) == 0
+            assert len(similarities) == 0
 
-    def test_embedding_model_loaded(self):
+    @pytest.mark.integration
+    def test_embedding_model_loaded(self, recommendation_system):
         """Should have embedding model loaded (when sentence-transformers is available)."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
@@ -113,61 +126,60 @@ class TestLoadedRecommendationSystem:
             pytest.skip("Embedding model not available (sentence-transformers not installed)")
         assert recommendation_system.embedding_model is not None
 
-    def test_random_playlist_returns_data(self):
+    def test_random_playlist_returns_data(self, recommendation_system):
         """Random playlist should return recommendations."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
         result = recommendation_system.get_random_playlist(n_recommendations=5)
         assert result is not None
         assert len(result) == 5
-        assert "title" in result.columns
-        assert "similarity" in result.columns
+        assert result[0].keys() >= {"title", "similarity"}
 
-    def test_item_based_filtering(self):
+    def test_item_based_filtering(self, recommendation_system, fake_embedding_model):
         """Item-based filtering should return recommendations."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
-        if recommendation_system.embedding_model is None:
-            pytest.skip("Embedding model not available")
         result = recommendation_system.item_based_filtering("sleep", n_recommendations=3)
         if result is not None:
             assert len(result) <= 3
-            assert "title" in result.columns
-            assert "similarity" in result.columns
+            assert result[0].keys() >= {"title", "similarity"}
 
-    def test_content_filtering(self):
+    def test_content_filtering(self, recommendation_system, fake_embedding_model):
         """Content filtering should return recommendations."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
-        if recommendation_system.embedding_model is None:
-            pytest.skip("Embedding model not available")
         result = recommendation_system.content_filtering(
             "how to improve sleep quality",
             top_n=5
         )
         assert result is not None
         assert len(result) <= 5
-        assert "title" in result.columns
-        assert "similarity" in result.columns
+        assert result[0].keys() >= {"title", "similarity"}
 
-    def test_content_filtering_with_duration(self):
+    def test_content_filtering_with_duration(self, recommendation_system, fake_embedding_model):
         """Content filtering should respect max duration."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
-        if recommendation_system.embedding_model is None:
-            pytest.skip("Embedding model not available")
         result = recommendation_system.content_filtering(
             "meditation",
             top_n=10,
             max_min=30
         )
         if result is not None and len(result) > 0:
-            assert all(result["duration_min"] <= 30)
+            assert all(rec["duration_min"] <= 30 for rec in result)
+
+    def test_query_encode_cached(self, main_module, recommendation_system, fake_embedding_model):
+        """Repeat queries should hit the encode cache instead of the model."""
+        if recommendation_system.podcast_data is None:
+            pytest.skip("Recommendation system not loaded")
+        before = main_module._encode_query.cache_info().hits
+        recommendation_system.content_filtering("morning exercise routine", top_n=3)
+        recommendation_system.content_filtering("morning exercise routine", top_n=3)
+        assert main_module._encode_query.cache_info().hits > before
 
-    def test_similarity_scores_in_range(self):
+    def test_similarity_scores_in_range(self, recommendation_system):
         """Similarity scores should be between -1 and 1."""
         if recommendation_system.podcast_data is None:
             pytest.skip("Recommendation system not loaded")
         result = recommendation_system.get_random_playlist(n_recommendations=5)
-        assert all(result["similarity"] >= -1)
-        assert all(result["similarity"] <= 1)
+        assert all(-1 <= rec["similarity"] <= 1 for rec in result)